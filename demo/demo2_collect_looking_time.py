@@ -14,10 +14,11 @@ DISPSIZE = (1280, 1024)
 CALINORMP = [(-0.4, 0.4), (-0.4, -0.4), (0.0, 0.0), (0.4, 0.4), (0.4, -0.4)]
 CALIPOINTS = [(x * DISPSIZE[0], y * DISPSIZE[1]) for x, y in CALINORMP]
 # correct path for calibration stimuli
-CALISTIMS = [
-    'infant/{}'.format(x) for x in os.listdir(os.path.join(DIR, 'infant'))
-    if x.endswith('.png') and not x.startswith('.')
-]
+CALISTIMS = sorted(
+    'infant/{}'.format(entry.name)
+    for entry in os.scandir(os.path.join(DIR, 'infant'))
+    if entry.is_file() and entry.name.endswith('.png')
+    and not entry.name.startswith('.'))
 
 ###############################################################################
 # Demo
@@ -27,6 +28,12 @@ win = visual.Window(size=[1280, 1024],
                     fullscr=True,
                     allowGUI=False)
 
+# load the calibration stimuli before the session starts instead of when the
+# calibration begins
+calibration_stims = [
+    visual.ImageStim(win, image=stim, autoLog=False) for stim in CALISTIMS
+]
+
 # prepare the experiment stimuli
 tar_1 = visual.ImageStim(win,
                          'stim/checkboard_big.png',
@@ -44,7 +51,7 @@ alltar = [tar_1, tar_2]
 controller = TobiiInfantController(win)
 
 # setup the attention grabber during adjusting the participant's position
-grabber = visual.MovieStim3(win, "infant/seal-clip.mp4")
+grabber = visual.MovieStim(win, "infant/seal-clip.mp4")
 grabber.setAutoDraw(True)
 grabber.play()
 # show the relative position of the subject to the eyetracker
@@ -63,7 +70,7 @@ grabber.stop()
 # - Choose the points to recalibrate with 1~9.
 # - Press decision_key (default is space) to accept the calibration or
 # recalibrate.
-success = controller.run_calibration(CALIPOINTS, CALISTIMS)
+success = controller.run_calibration(CALIPOINTS, calibration_stims)
 if not success:
     core.quit()
 
@@ -14,10 +14,11 @@ DISPSIZE = (1280, 1024)
 CALINORMP = [(-0.4, 0.4), (-0.4, -0.4), (0.0, 0.0), (0.4, 0.4), (0.4, -0.4)]
 CALIPOINTS = [(x * DISPSIZE[0], y * DISPSIZE[1]) for x, y in CALINORMP]
 # correct path for calibration stimuli
-CALISTIMS = [
-    'infant/{}'.format(x) for x in os.listdir(os.path.join(DIR, 'infant'))
-    if x.endswith('.png') and not x.startswith('.')
-]
+CALISTIMS = sorted(
+    'infant/{}'.format(entry.name)
+    for entry in os.scandir(os.path.join(DIR, 'infant'))
+    if entry.is_file() and entry.name.endswith('.png')
+    and not entry.name.startswith('.'))
 
 ###############################################################################
 # Demo
@@ -28,11 +29,17 @@ win = visual.Window(
     fullscr=True,
     allowGUI=False)
 
+# load the calibration stimuli before the session starts instead of when the
+# calibration begins
+calibration_stims = [
+    visual.ImageStim(win, image=stim, autoLog=False) for stim in CALISTIMS
+]
+
 # initialize TobiiInfantController to communicate with the eyetracker
 controller = TobiiInfantController(win)
 
 # setup the attention grabber during adjusting the participant's position
-grabber = visual.MovieStim3(win, "infant/seal-clip.mp4")
+grabber = visual.MovieStim(win, "infant/seal-clip.mp4")
 grabber.setAutoDraw(True)
 grabber.play()
 # show the relative position of the subject to the eyetracker
@@ -51,12 +58,12 @@ grabber.stop()
 # - Choose the points to recalibrate with 1~9.
 # - Press decision_key (default is space) to accept the calibration or
 # recalibrate.
-success = controller.run_calibration(CALIPOINTS, CALISTIMS)
+success = controller.run_calibration(CALIPOINTS, calibration_stims)
 if not success:
     core.quit()
 
 # prepare the video
-movie = visual.MovieStim3(
+movie = visual.MovieStim(
     win,
     'infant/seal-clip.mp4',
     size=[600, 600],
@@ -76,6 +83,7 @@ lt = controller.collect_lt(10, 2)
 print('Looking time: %.3fs' % lt)
 # when finish, remove the movie
 movie.setAutoDraw(False)
+movie.stop()
 
 # stop recording
 controller.stop_recording()
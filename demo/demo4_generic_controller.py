@@ -1,6 +1,6 @@
+import math
 import os
 
-import numpy as np
 from psychopy import core, event, visual
 
 from psychopy_tobii_infant import TobiiController
@@ -61,30 +61,41 @@ marker = visual.Rect(win, width=20, height=20, autoLog=False)
 # TobiiController instance
 controller.start_recording('demo4-test.tsv')
 waitkey = True
+pressed_keys = []
 timer = core.Clock()
 
+# draw the marker on every flip
+marker.autoDraw = True
+marker_color = None
 # Press space to leave
 while waitkey:
     # Get the latest gaze position data.
     currentGazePosition = controller.get_current_gaze_position()
 
     # The value is numpy.nan if Tobii failed to detect gaze position.
-    if np.nan not in currentGazePosition:
-        marker.setPos(currentGazePosition)
-        marker.setLineColor('white')
+    gaze_x, gaze_y = currentGazePosition
+    if not (math.isnan(gaze_x) or math.isnan(gaze_y)):
+        marker.pos = currentGazePosition
+        new_color = 'white'
     else:
-        marker.setLineColor('red')
+        new_color = 'red'
+    # only update the color when it changes
+    if new_color != marker_color:
+        marker.lineColor = new_color
+        marker_color = new_color
     keys = event.getKeys()
     if 'space' in keys:
         waitkey = False
     elif len(keys) >= 1:
         # Record the pressed key to the data file.
         controller.record_event(keys[0])
-        print('pressed {k} at {t} ms'.format(k=keys[0],
-                                             t=timer.getTime() * 1000))
+        # print the key after the loop, stdout is slow
+        pressed_keys.append((keys[0], timer.getTime() * 1000))
 
-    marker.draw()
     win.flip()
+marker.autoDraw = False
+for key, t in pressed_keys:
+    print('pressed {k} at {t} ms'.format(k=key, t=t))
 
 # stop recording
 controller.stop_recording()
@@ -93,28 +104,39 @@ controller.stop_recording()
 controller.start_recording(newfile=False)
 
 waitkey = True
+pressed_keys = []
+# draw the marker on every flip
+marker.autoDraw = True
+marker_color = None
 # Press space to leave
 while waitkey:
     # Get the latest gaze position data.
     currentGazePosition = controller.get_current_gaze_position()
 
     # The value is numpy.nan if Tobii failed to detect gaze position.
-    if np.nan not in currentGazePosition:
-        marker.setPos(currentGazePosition)
-        marker.setLineColor('white')
+    gaze_x, gaze_y = currentGazePosition
+    if not (math.isnan(gaze_x) or math.isnan(gaze_y)):
+        marker.pos = currentGazePosition
+        new_color = 'white'
     else:
-        marker.setLineColor('red')
+        new_color = 'red'
+    # only update the color when it changes
+    if new_color != marker_color:
+        marker.lineColor = new_color
+        marker_color = new_color
     keys = event.getKeys()
     if 'space' in keys:
         waitkey = False
     elif len(keys) >= 1:
         # Record the pressed key to the data file.
         controller.record_event(keys[0])
-        print('pressed {k} at {t} ms'.format(k=keys[0],
-                                             t=timer.getTime() * 1000))
+        # print the key after the loop, stdout is slow
+        pressed_keys.append((keys[0], timer.getTime() * 1000))
 
-    marker.draw()
     win.flip()
+marker.autoDraw = False
+for key, t in pressed_keys:
+    print('pressed {k} at {t} ms'.format(k=key, t=t))
 
 # stop recording
 controller.stop_recording()
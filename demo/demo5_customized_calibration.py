@@ -1,7 +1,7 @@
+import math
 import os
 import types
 
-import numpy as np
 from psychopy import core, event, sound, visual
 
 from psychopy_tobii_infant import TobiiInfantController
@@ -16,10 +16,11 @@ CALINORMP = [(-0.4, 0.4), (-0.4, -0.4), (0.0, 0.0), (0.4, 0.4), (0.4, -0.4)]
 CALIPOINTS = [(x * DISPSIZE[0], y * DISPSIZE[1]) for x, y in CALINORMP]
 # stimuli to use in calibration
 # The number of stimuli must be the same or larger than the calibration points.
-CALISTIMS = [
-    'infant/{}'.format(x) for x in os.listdir(os.path.join(DIR, 'infant'))
-    if x.endswith('.png') and not x.startswith('.')
-]
+CALISTIMS = sorted(
+    'infant/{}'.format(entry.name)
+    for entry in os.scandir(os.path.join(DIR, 'infant'))
+    if entry.is_file() and entry.name.endswith('.png')
+    and not entry.name.startswith('.'))
 SOUNDSTIM = 'infant/wawa.wav'
 
 ###############################################################################
@@ -30,11 +31,17 @@ win = visual.Window(size=[1280, 1024],
                     fullscr=True,
                     allowGUI=False)
 
+# load the calibration stimuli before the session starts instead of when the
+# calibration begins
+calibration_stims = [
+    visual.ImageStim(win, image=stim, autoLog=False) for stim in CALISTIMS
+]
+
 # prepare the audio stimuli used in calibration
 audio_grabber = sound.Sound(SOUNDSTIM)
 
 # setup the attention grabber during adjusting the participant's position
-grabber = visual.MovieStim3(win, "infant/seal-clip.mp4")
+grabber = visual.MovieStim(win, "infant/seal-clip.mp4")
 
 
 # create a customized calibration procedure with sound
@@ -44,26 +51,36 @@ def customized_update_calibration(self,
                                   collect_key='space',
                                   exit_key='return'):
     # start calibration
-    event.clearEvents()
+    self._clear_keys()
     point_idx = -1
     in_calibration = True
+    calibration_keys = [*self.numkey_dict, collect_key, exit_key]
+    # the points to calibrate do not change during the procedure
+    retry_points = frozenset(self.retry_points)
     clock = core.Clock()
     while in_calibration:
         # get keys
-        keys = event.getKeys()
+        keys = self._get_keys(calibration_keys)
         for key in keys:
-            if key in self.numkey_dict:
-                point_idx = self.numkey_dict[key]
-                # -- Modification begin --
-                # play the sound
-                if point_idx in self.retry_points:
+            key_index = self.numkey_dict.get(key)
+            if key_index is not None:
+                point_idx = key_index
+                if point_idx in retry_points:
+                    # prepare the target once instead of on every frame
+                    this_target = self.targets.get_stim(point_idx)
+                    this_target.setPos(
+                        self.original_calibration_points[point_idx])
+                    target_w, target_h = (
+                        self.targets.get_stim_original_size(point_idx))
+                    # -- Modification begin --
+                    # play the sound
                     audio_grabber.play()
-                # -- Modification end --
+                    # -- Modification end --
             elif key == collect_key:
                 # allow the participant to focus
                 core.wait(_focus_time, 0.0)
                 # collect samples when space is pressed
-                if point_idx in self.retry_points:
+                if point_idx in retry_points:
                     self._collect_calibration_data(
                         self.original_calibration_points[point_idx])
                     point_idx = -1
@@ -77,16 +94,10 @@ def customized_update_calibration(self,
                 break
 
         # draw calibration target
-        if point_idx in self.retry_points:
-            this_target = self.targets.get_stim(point_idx)
-            this_pos = self.original_calibration_points[point_idx]
-            this_target.setPos(this_pos)
+        if point_idx in retry_points:
             t = clock.getTime() * self.shrink_speed
-            newsize = [
-                (np.sin(t)**2 + self.calibration_target_min) * e
-                for e in self.targets.get_stim_original_size(point_idx)
-            ]
-            this_target.setSize(newsize)
+            scale = math.sin(t)**2 + self.calibration_target_min
+            this_target.setSize((scale * target_w, scale * target_h))
             this_target.draw()
         self.win.flip()
 
@@ -116,7 +127,7 @@ grabber.stop()
 # - Choose the points to recalibrate with 1~9.
 # - Press decision_key (default is space) to accept the calibration or
 # recalibrate.
-success = controller.run_calibration(CALIPOINTS, CALISTIMS)
+success = controller.run_calibration(CALIPOINTS, calibration_stims)
 if not success:
     core.quit()
 
@@ -127,30 +138,41 @@ marker = visual.Rect(win, width=20, height=20, autoLog=False)
 # TobiiInfantController instance
 controller.start_recording('demo5-test.tsv')
 waitkey = True
+pressed_keys = []
 timer = core.Clock()
 
+# draw the marker on every flip
+marker.autoDraw = True
+marker_color = None
 # Press space to leave
 while waitkey:
     # Get the latest gaze position data.
     currentGazePosition = controller.get_current_gaze_position()
 
     # The value is numpy.nan if Tobii failed to detect gaze position.
-    if np.nan not in currentGazePosition:
-        marker.setPos(currentGazePosition)
-        marker.setLineColor('white')
+    gaze_x, gaze_y = currentGazePosition
+    if not (math.isnan(gaze_x) or math.isnan(gaze_y)):
+        marker.pos = currentGazePosition
+        new_color = 'white'
     else:
-        marker.setLineColor('red')
+        new_color = 'red'
+    # only update the color when it changes
+    if new_color != marker_color:
+        marker.lineColor = new_color
+        marker_color = new_color
     keys = event.getKeys()
     if 'space' in keys:
         waitkey = False
     elif len(keys) >= 1:
         # Record the pressed key to the data file.
         controller.record_event(keys[0])
-        print('pressed {k} at {t} ms'.format(k=keys[0],
-                                             t=timer.getTime() * 1000))
+        # print the key after the loop, stdout is slow
+        pressed_keys.append((keys[0], timer.getTime() * 1000))
 
-    marker.draw()
     win.flip()
+marker.autoDraw = False
+for key, t in pressed_keys:
+    print('pressed {k} at {t} ms'.format(k=key, t=t))
 
 # stop recording
 controller.stop_recording()
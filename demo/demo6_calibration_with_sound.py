@@ -1,6 +1,6 @@
+import math
 import os
 
-import numpy as np
 from psychopy import core, event, sound, visual
 
 from psychopy_tobii_infant import TobiiInfantController
@@ -15,10 +15,11 @@ CALINORMP = [(-0.4, 0.4), (-0.4, -0.4), (0.0, 0.0), (0.4, 0.4), (0.4, -0.4)]
 CALIPOINTS = [(x * DISPSIZE[0], y * DISPSIZE[1]) for x, y in CALINORMP]
 # stimuli to use in calibration
 # The number of stimuli must be the same or larger than the calibration points.
-CALISTIMS = [
-    'infant/{}'.format(x) for x in os.listdir(os.path.join(DIR, 'infant'))
-    if x.endswith('.png') and not x.startswith('.')
-]
+CALISTIMS = sorted(
+    'infant/{}'.format(entry.name)
+    for entry in os.scandir(os.path.join(DIR, 'infant'))
+    if entry.is_file() and entry.name.endswith('.png')
+    and not entry.name.startswith('.'))
 SOUNDSTIM = 'infant/wawa.wav'
 
 ###############################################################################
@@ -29,11 +30,17 @@ win = visual.Window(size=[1280, 1024],
                     fullscr=True,
                     allowGUI=False)
 
+# load the calibration stimuli before the session starts instead of when the
+# calibration begins
+calibration_stims = [
+    visual.ImageStim(win, image=stim, autoLog=False) for stim in CALISTIMS
+]
+
 # initialize TobiiInfantController to communicate with the eyetracker
 controller = TobiiInfantController(win)
 
 # setup the attention grabber during adjusting the participant's position
-grabber = visual.MovieStim3(win, "infant/seal-clip.mp4")
+grabber = visual.MovieStim(win, "infant/seal-clip.mp4")
 # prepare the audio stimuli used in calibration
 calibration_sound = sound.Sound(SOUNDSTIM)
 
@@ -56,7 +63,7 @@ grabber.stop()
 # - Press decision_key (default is space) to accept the calibration or
 # recalibrate.
 success = controller.run_calibration(
-    CALIPOINTS, CALISTIMS, audio=calibration_sound
+    CALIPOINTS, calibration_stims, audio=calibration_sound
 )  # use audio parameter to define the sound object to use
 if not success:
     core.quit()
@@ -68,30 +75,41 @@ marker = visual.Rect(win, width=20, height=20, autoLog=False)
 # TobiiInfantController instance
 controller.start_recording('demo6-test.tsv')
 waitkey = True
+pressed_keys = []
 timer = core.Clock()
 
+# draw the marker on every flip
+marker.autoDraw = True
+marker_color = None
 # Press space to leave
 while waitkey:
     # Get the latest gaze position data.
     currentGazePosition = controller.get_current_gaze_position()
 
     # The value is numpy.nan if Tobii failed to detect gaze position.
-    if np.nan not in currentGazePosition:
-        marker.setPos(currentGazePosition)
-        marker.setLineColor('white')
+    gaze_x, gaze_y = currentGazePosition
+    if not (math.isnan(gaze_x) or math.isnan(gaze_y)):
+        marker.pos = currentGazePosition
+        new_color = 'white'
     else:
-        marker.setLineColor('red')
+        new_color = 'red'
+    # only update the color when it changes
+    if new_color != marker_color:
+        marker.lineColor = new_color
+        marker_color = new_color
     keys = event.getKeys()
     if 'space' in keys:
         waitkey = False
     elif len(keys) >= 1:
         # Record the pressed key to the data file.
         controller.record_event(keys[0])
-        print('pressed {k} at {t} ms'.format(k=keys[0],
-                                             t=timer.getTime() * 1000))
+        # print the key after the loop, stdout is slow
+        pressed_keys.append((keys[0], timer.getTime() * 1000))
 
-    marker.draw()
     win.flip()
+marker.autoDraw = False
+for key, t in pressed_keys:
+    print('pressed {k} at {t} ms'.format(k=key, t=t))
 
 # stop recording
 controller.stop_recording()
@@ -1,4 +1,5 @@
 import atexit
+import math
 import os
 from datetime import datetime
 
@@ -8,6 +9,13 @@ from PIL import Image, ImageDraw
 from psychopy import core, event, visual
 from psychopy.tools.monitorunittools import cm2pix, deg2pix, pix2cm, pix2deg
 
+_has_keyboard = True
+try:
+    # requires PsychoPy 3.1 or later
+    from psychopy.hardware import keyboard
+except ImportError:
+    _has_keyboard = False
+
 _has_addons = True
 # yapf: disable
 try:
@@ -30,7 +38,11 @@ class InfantStimuli:
 
     Args:
         win: psychopy.visual.Window object.
-        infant_stims: list of image files.
+        infant_stims: list of image files or psychopy.visual.ImageStim
+            objects. ImageStim objects are used as they are, so that images
+            can be loaded before the procedure starts; their current size is
+            taken as the original size, and their size, orientation and
+            position are restored by restore().
         shuffle: whether to shuffle the presentation order of the stimuli.
             Default is True.
         *kwargs: other arguments to pass into psychopy.visual.ImageStim.
@@ -40,10 +52,17 @@ class InfantStimuli:
     """
     def __init__(self, win, infant_stims, shuffle=True, *kwargs):
         self.win = win
-        self.stims = dict((i, visual.ImageStim(self.win, image=stim, *kwargs))
-                          for i, stim in enumerate(infant_stims))
-        self.stim_size = dict(
-            (i, image_stim.size) for i, image_stim in self.stims.items())
+        self.stims = dict(
+            (i, stim if isinstance(stim, visual.ImageStim) else
+             visual.ImageStim(self.win, image=stim, autoLog=False, *kwargs))
+            for i, stim in enumerate(infant_stims))
+        # snapshot the attributes the procedures change
+        self.stim_size = dict((i, image_stim.size.copy())
+                              for i, image_stim in self.stims.items())
+        self.stim_ori = dict(
+            (i, image_stim.ori) for i, image_stim in self.stims.items())
+        self.stim_pos = dict((i, np.array(image_stim.pos))
+                             for i, image_stim in self.stims.items())
         self.present_order = [*self.stims]
         if shuffle:
             np.random.shuffle(self.present_order)
@@ -73,6 +92,22 @@ class InfantStimuli:
         return self.stim_size[self.present_order[idx %
                                                  len(self.present_order)]]
 
+    def restore(self):
+        """Restore the size, orientation and position of the stimuli.
+
+            The calibration and validation procedures resize, rotate and move
+            the stimuli. Restoring them lets the same ImageStim objects be
+            passed to another procedure.
+
+        Returns:
+            None
+        """
+        for i, image_stim in self.stims.items():
+            # copies, so that later in-place changes keep the snapshots intact
+            image_stim.setSize(self.stim_size[i].copy())
+            image_stim.setOri(self.stim_ori[i])
+            image_stim.setPos(self.stim_pos[i].copy())
+
 
 class TobiiController:
     """Tobii controller for PsychoPy.
@@ -156,6 +191,8 @@ class TobiiController:
     recording = False
     datafile = None
     validation_result_buffers = None
+    _validation_result_msg = None
+    _keyboard = None
 
     def __init__(self, win, id=0, filename="gaze_TOBII_output.tsv"):
         self.eyetracker_id = id
@@ -185,6 +222,8 @@ class TobiiController:
         if _has_addons:
             self.update_validation = self._update_validation_auto
         self.gaze_data = []
+        if _has_keyboard:
+            self._keyboard = keyboard.Keyboard()
         atexit.register(self.close)
 
     def _on_gaze_data(self, gaze_data):
@@ -198,6 +237,40 @@ class TobiiController:
         """
         self.gaze_data.append(gaze_data)
 
+    def _get_keys(self, key_list):
+        """Get the pressed keys.
+
+            psychopy.hardware.keyboard is used if it is available, which
+            timestamps key presses asynchronously. Otherwise psychopy.event is
+            used.
+
+        Args:
+            key_list: list of keys to check.
+
+        Returns:
+            A list of the names of the pressed keys in key_list.
+        """
+        if self._keyboard is None:
+            return event.getKeys(keyList=key_list)
+
+        return [
+            key.name for key in self._keyboard.getKeys(keyList=key_list,
+                                                       waitRelease=False)
+        ]
+
+    def _clear_keys(self):
+        """Discard all the pressed keys.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._keyboard is not None:
+            self._keyboard.clearEvents()
+        event.clearEvents()
+
     def _get_psychopy_pos(self, p, units=None):
         """Convert Tobii ADCS coordinates to PsychoPy coordinates.
 
@@ -223,7 +296,7 @@ class TobiiController:
             elif units == "cm":
                 return tuple(pix2cm(pos, self.win.monitor) for pos in p_pix)
             elif units == "deg":
-                tuple(pix2deg(pos, self.win.monitor) for pos in p_pix)
+                return tuple(pix2deg(pos, self.win.monitor) for pos in p_pix)
             else:
                 return tuple(
                     pix2deg(np.array(p_pix),
@@ -438,14 +511,12 @@ class TobiiController:
             "PupilSize"]) + "\n")  # yapf: disable
         self._flush_to_file()
 
-        for gaze_data in self.gaze_data:
-            output = self._convert_tobii_record(gaze_data)
-            self.datafile.write("\t".join(output))
-            self.datafile.write("\n")
-        else:
-            # write the events in the end of data
-            for this_event in self.event_data:
-                self.datafile.write("{}\t{}\n".format(*this_event))
+        self.datafile.writelines(
+            "\t".join(self._convert_tobii_record(gaze_data)) + "\n"
+            for gaze_data in self.gaze_data)
+        # write the events in the end of data
+        self.datafile.writelines("{}\t{}\n".format(*this_event)
+                                 for this_event in self.event_data)
         self.datafile.write("Session End\n")
         self._flush_to_file()
 
@@ -668,12 +739,14 @@ class TobiiController:
             radius=self.calibration_dot_size,
             fillColor=self.calibration_dot_color,
             lineColor=self.calibration_dot_color,
+            autoLog=False,
         )
         self.calibration_target_disc = visual.Circle(
             self.win,
             radius=self.calibration_disc_size,
             fillColor=self.calibration_disc_color,
             lineColor=self.calibration_disc_color,
+            autoLog=False,
         )
         self.retry_marker = visual.Circle(
             self.win,
@@ -698,13 +771,34 @@ class TobiiController:
             autoLog=False,
         )
 
+        return self._run_calibration_loop(calibration_points, focus_time,
+                                          decision_key, result_msg)
+
+    def _run_calibration_loop(self, calibration_points, focus_time,
+                              decision_key, result_msg):
+        """Calibrate and let the experimenter accept or retry the result.
+
+            Shared by the run_calibration() implementations, which prepare the
+            stimuli beforehand.
+
+        Args:
+            calibration_points: list of position of the calibration points.
+            focus_time: the duration allowing the subject to focus in seconds.
+            decision_key: key to leave the procedure.
+            result_msg: psychopy.visual.TextStim for the instructions on the
+                result screen.
+
+        Returns:
+            bool: The status of calibration. True for success, False otherwise.
+        """
         self.original_calibration_points = calibration_points[:]
         # set all points
         cp_num = len(self.original_calibration_points)
         self.retry_points = list(range(cp_num))
+        result_keys = [decision_key, "escape", *self.numkey_dict]
 
         in_calibration_loop = True
-        event.clearEvents()
+        self._clear_keys()
 
         self.calibration.enter_calibration_mode()
         while in_calibration_loop:
@@ -719,6 +813,8 @@ class TobiiController:
             self.win.flip()
 
             result_img = self._show_calibration_result()
+            # discard the keys pressed during the calibration procedure
+            self._clear_keys()
             result_msg.setText(
                 "Accept/Retry: {k}\n"
                 "Select/Deselect all points: 0\n"
@@ -728,22 +824,21 @@ class TobiiController:
             waitkey = True
             self.retry_points = []
             while waitkey:
-                for key in event.getKeys():
+                for key in self._get_keys(result_keys):
+                    key_index = self.numkey_dict.get(key)
                     if key in [decision_key, "escape"]:
                         waitkey = False
-                    elif key in self.numkey_dict:
-                        if self.numkey_dict[key] == -1:
+                    elif key_index is not None:
+                        if key_index == -1:
                             if len(self.retry_points) == cp_num:
                                 self.retry_points = []
                             else:
                                 self.retry_points = list(range(cp_num))
-                        else:
-                            key_index = self.numkey_dict[key]
-                            if key_index < cp_num:
-                                if key_index in self.retry_points:
-                                    self.retry_points.remove(key_index)
-                                else:
-                                    self.retry_points.append(key_index)
+                        elif key_index < cp_num:
+                            if key_index in self.retry_points:
+                                self.retry_points.remove(key_index)
+                            else:
+                                self.retry_points.append(key_index)
 
                 result_img.draw()
                 if len(self.retry_points) > 0:
@@ -769,6 +864,8 @@ class TobiiController:
                 in_calibration_loop = False
 
         self.calibration.leave_calibration_mode()
+        # discard the keys that were not handled during calibration
+        self._clear_keys()
 
         return retval
 
@@ -886,51 +983,74 @@ class TobiiController:
             self.validation_result_buffers.append(result_buffer)
 
         if show_results:
-            result_msg = visual.TextStim(self.win,
-                                         pos=(0, -self.win.size[1] / 4),
-                                         color=result_msg_color,
-                                         units="pix",
-                                         alignText="left",
-                                         wrapWidth=self.win.size[0] * 0.6,
-                                         autoLog=False)
+            # reuse the text stimulus across validations
+            if self._validation_result_msg is None:
+                self._validation_result_msg = visual.TextStim(
+                    self.win,
+                    pos=(0, -self.win.size[1] / 4),
+                    units="pix",
+                    alignText="left",
+                    wrapWidth=self.win.size[0] * 0.6,
+                    autoLog=False)
+            result_msg = self._validation_result_msg
+            result_msg.setColor(result_msg_color)
             result_msg.setText(result_buffer.replace("\t", " "))
-            result_msg.draw()
-            self.win.flip()
 
             waitkey = True
             while waitkey:
-                for key in event.getKeys():
+                # keep flipping so that the window stays responsive
+                result_msg.draw()
+                self.win.flip()
+                for key in self._get_keys([decision_key]):
                     if key == decision_key:
                         waitkey = False
                         break
+            # discard the keys that were not handled
+            self._clear_keys()
 
-    def _update_validation_auto(self, validation_points, _focus_time=0.5):
-        """Automatic validation procedure."""
-        # start
+    def _collect_at_shrinking_target(self, points, collect, _focus_time=0.5):
+        """Shrink the target at each point and collect samples afterwards.
+
+        Shared by the automatic calibration and validation procedures.
+
+        Args:
+            points: list of positions to show the target at, in order.
+            collect: function called with each position once the target has
+                shrunk.
+            _focus_time: the duration allowing the subject to focus in
+                seconds. Default is 0.5.
+
+        Returns:
+            None
+        """
         clock = core.Clock()
-        for current_validation_point in validation_points:
-            self.calibration_target_disc.setPos(current_validation_point)
-            self.calibration_target_dot.setPos(current_validation_point)
+        for this_pos in points:
+            self.calibration_target_disc.setPos(this_pos)
+            self.calibration_target_dot.setPos(this_pos)
             clock.reset()
             while True:
-                t = clock.getTime() * self.shrink_speed
-                self.calibration_target_disc.setRadius([
-                    (np.sin(t)**2 + self.calibration_target_min) *
-                    self.calibration_disc_size
-                ])
-                self.calibration_target_dot.setRadius([
-                    (np.sin(t)**2 + self.calibration_target_min) *
-                    self.calibration_dot_size
-                ])
+                elapsed = clock.getTime()
+                t = elapsed * self.shrink_speed
+                scale = math.sin(t)**2 + self.calibration_target_min
+                self.calibration_target_disc.setRadius(
+                    [scale * self.calibration_disc_size])
+                self.calibration_target_dot.setRadius(
+                    [scale * self.calibration_dot_size])
                 self.calibration_target_disc.draw()
                 self.calibration_target_dot.draw()
-                if clock.getTime() >= self._shrink_sec:
+                if elapsed >= self._shrink_sec:
                     core.wait(_focus_time, 0.0)
-                    self._collect_validation_data(current_validation_point)
+                    collect(this_pos)
                     break
 
                 self.win.flip()
 
+    def _update_validation_auto(self, validation_points, _focus_time=0.5):
+        """Automatic validation procedure."""
+        self._collect_at_shrinking_target(validation_points,
+                                          self._collect_validation_data,
+                                          _focus_time)
+
     def _show_calibration_result(self):
         img = Image.new("RGBA", tuple(self.win.size))
         img_draw = ImageDraw.Draw(img)
@@ -990,32 +1110,9 @@ class TobiiController:
 
     def _update_calibration_auto(self, _focus_time=0.5):
         """Automatic calibration procedure."""
-        # start calibration
-        event.clearEvents()
-        clock = core.Clock()
-        for point_idx in self.retry_points:
-            this_pos = self.original_calibration_points[point_idx]
-            self.calibration_target_disc.setPos(this_pos)
-            self.calibration_target_dot.setPos(this_pos)
-            clock.reset()
-            while True:
-                t = clock.getTime() * self.shrink_speed
-                self.calibration_target_disc.setRadius([
-                    (np.sin(t)**2 + self.calibration_target_min) *
-                    self.calibration_disc_size
-                ])
-                self.calibration_target_dot.setRadius([
-                    (np.sin(t)**2 + self.calibration_target_min) *
-                    self.calibration_dot_size
-                ])
-                self.calibration_target_disc.draw()
-                self.calibration_target_dot.draw()
-                if clock.getTime() >= self._shrink_sec:
-                    core.wait(_focus_time, 0.0)
-                    self._collect_calibration_data(this_pos)
-                    break
-
-                self.win.flip()
+        self._collect_at_shrinking_target(
+            [self.original_calibration_points[x] for x in self.retry_points],
+            self._collect_calibration_data, _focus_time)
 
     def show_status(self, decision_key="space"):
         """Showing the participant's gaze position in track box.
@@ -1113,7 +1210,7 @@ class TobiiController:
                 ))
                 zpos.draw()
 
-            for key in event.getKeys():
+            for key in self._get_keys([decision_key]):
                 if key == decision_key:
                     b_show_status = False
                     break
@@ -1122,6 +1219,8 @@ class TobiiController:
 
         self.eyetracker.unsubscribe_from(tr.EYETRACKER_USER_POSITION_GUIDE,
                                          self._on_gaze_data)
+        # discard the keys that were not handled
+        self._clear_keys()
 
     # property getters and setters for parameter changes
     @property
@@ -1189,26 +1288,36 @@ class TobiiInfantController(TobiiController):
             None
         """
         # start calibration
-        event.clearEvents()
+        self._clear_keys()
         point_idx = -1
         in_calibration = True
+        calibration_keys = [*self.numkey_dict, collect_key, exit_key]
+        # the points to calibrate do not change during the procedure
+        retry_points = frozenset(self.retry_points)
         clock = core.Clock()
         while in_calibration:
             # get keys
-            keys = event.getKeys()
+            keys = self._get_keys(calibration_keys)
             for key in keys:
-                if key in self.numkey_dict:
-                    point_idx = self.numkey_dict[key]
-
-                    # play the sound if it exists
-                    if self._audio is not None:
-                        if point_idx in self.retry_points:
+                key_index = self.numkey_dict.get(key)
+                if key_index is not None:
+                    point_idx = key_index
+
+                    if point_idx in retry_points:
+                        # prepare the target once instead of on every frame
+                        this_target = self.targets.get_stim(point_idx)
+                        this_target.setPos(
+                            self.original_calibration_points[point_idx])
+                        target_w, target_h = (
+                            self.targets.get_stim_original_size(point_idx))
+                        # play the sound if it exists
+                        if self._audio is not None:
                             self._audio.play()
                 elif key == collect_key:
                     # allow the participant to focus
                     core.wait(_focus_time, 0.0)
                     # collect samples when space is pressed
-                    if point_idx in self.retry_points:
+                    if point_idx in retry_points:
                         self._collect_calibration_data(
                             self.original_calibration_points[point_idx])
                         point_idx = -1
@@ -1221,16 +1330,10 @@ class TobiiInfantController(TobiiController):
                     break
 
             # draw calibration target
-            if point_idx in self.retry_points:
-                this_target = self.targets.get_stim(point_idx)
-                this_pos = self.original_calibration_points[point_idx]
-                this_target.setPos(this_pos)
+            if point_idx in retry_points:
                 t = clock.getTime() * self.shrink_speed
-                newsize = [
-                    (np.sin(t)**2 + self.calibration_target_min) * e
-                    for e in self.targets.get_stim_original_size(point_idx)
-                ]
-                this_target.setSize(newsize)
+                scale = math.sin(t)**2 + self.calibration_target_min
+                this_target.setSize((scale * target_w, scale * target_h))
                 this_target.draw()
             self.win.flip()
 
@@ -1240,7 +1343,7 @@ class TobiiInfantController(TobiiController):
                                   collect_key="space"):
         """Semi-automatic validation procedure for infants."""
         for idx, current_validation_point in enumerate(validation_points):
-            event.clearEvents()
+            self._clear_keys()
             deg = 0
             this_target = self.targets.get_stim(idx)
             orig_size = self.targets.get_stim_original_size(idx)
@@ -1255,13 +1358,15 @@ class TobiiInfantController(TobiiController):
                 this_target.draw()
                 self.win.flip()
 
-                keys = event.getKeys()
+                keys = self._get_keys([collect_key])
                 for key in keys:
                     if key == collect_key:
                         core.wait(_focus_time, 0.0)
                         self._collect_validation_data(current_validation_point)
                         in_validation = False
                         break
+        # discard the keys that were not handled
+        self._clear_keys()
 
     def run_calibration(self,
                         calibration_points,
@@ -1291,10 +1396,11 @@ class TobiiInfantController(TobiiController):
 
         Args:
             calibration_points: list of position of the calibration points.
-            infant_stims: list of images to attract the infant. If the number
-                of images is equal to or larger than the number of calibration
-                points, the images will be used in order. If not, the images
-                will be repeated.
+            infant_stims: list of images (files or psychopy.visual.ImageStim
+                objects) to attract the infant. If the number of images is
+                equal to or larger than the number of calibration points, the
+                images will be used in order. If not, the images will be
+                repeated.
             shuffle: whether to shuffle the presentation order of the stimuli.
                 Default is True.
             audio: the psychopy.sound.Sound object to play during calibration.
@@ -1346,77 +1452,10 @@ class TobiiInfantController(TobiiController):
             autoLog=False,
         )
 
-        self.calibration.enter_calibration_mode()
-
-        self.original_calibration_points = calibration_points[:]
-        # set all points
-        cp_num = len(self.original_calibration_points)
-        self.retry_points = list(range(cp_num))
-
-        in_calibration_loop = True
-        event.clearEvents()
-        while in_calibration_loop:
-            self.calibration_points = [
-                self.original_calibration_points[x] for x in self.retry_points
-            ]
-
-            # clear the display
-            self.win.flip()
-            self.update_calibration(_focus_time=focus_time)
-            self.calibration_result = self.calibration.compute_and_apply()
-            self.win.flip()
-
-            result_img = self._show_calibration_result()
-            result_msg.setText(
-                "Accept/Retry: {k}\n"
-                "Select/Deselect all points: 0\n"
-                "Select/Deselect recalibration points: 1-{p} key\n"
-                "Abort: esc".format(k=decision_key, p=cp_num))
-
-            waitkey = True
-            self.retry_points = []
-            while waitkey:
-                for key in event.getKeys():
-                    if key in [decision_key, "escape"]:
-                        waitkey = False
-                    elif key in self.numkey_dict:
-                        if self.numkey_dict[key] == -1:
-                            if len(self.retry_points) == cp_num:
-                                self.retry_points = []
-                            else:
-                                self.retry_points = list(range(cp_num))
-                        else:
-                            key_index = self.numkey_dict[key]
-                            if key_index < cp_num:
-                                if key_index in self.retry_points:
-                                    self.retry_points.remove(key_index)
-                                else:
-                                    self.retry_points.append(key_index)
-
-                result_img.draw()
-                if len(self.retry_points) > 0:
-                    for retry_p in self.retry_points:
-                        self.retry_marker.setPos(
-                            self.original_calibration_points[retry_p])
-                        self.retry_marker.draw()
-
-                result_msg.draw()
-                self.win.flip()
-
-            if key == decision_key:
-                if len(self.retry_points) == 0:
-                    retval = True
-                    in_calibration_loop = False
-                else:  # retry
-                    for point_index in self.retry_points:
-                        x, y = self._get_tobii_pos(
-                            self.original_calibration_points[point_index])
-                        self.calibration.discard_data(x, y)
-            elif key == "escape":
-                retval = False
-                in_calibration_loop = False
-
-        self.calibration.leave_calibration_mode()
+        retval = self._run_calibration_loop(calibration_points, focus_time,
+                                            decision_key, result_msg)
+        # hand the stimuli back to the caller unchanged
+        self.targets.restore()
 
         return retval
 
@@ -1438,9 +1477,9 @@ class TobiiInfantController(TobiiController):
         Args:
             validation_points: list of position of the validation points. If
                 None, the calibration points are used. Default is None.
-            infant_stims: list of images to attract the infant. If None,
-                stimuli used in the latest calibration procedure are used.
-                Default is None.
+            infant_stims: list of images (files or psychopy.visual.ImageStim
+                objects) to attract the infant. If None, stimuli used in the
+                latest calibration procedure are used. Default is None.
             shuffle: whether to shuffle the presentation order of the stimuli.
                 Default is True. Has no effects if infant_stims is set to None.
             sample_count: The number of samples to collect. Default is 30,
@@ -1482,6 +1521,8 @@ class TobiiInfantController(TobiiController):
         self.validation.enter_validation_mode()
         self.update_validation(validation_points=validation_points,
                                _focus_time=focus_time)
+        # hand the stimuli back to the caller unchanged
+        self.targets.restore()
         validation_result = self.validation.compute()
         self.validation.leave_validation_mode()
         self.win.flip()
@@ -1512,7 +1553,8 @@ class TobiiInfantController(TobiiController):
         """
         trial_timer = core.Clock()
         absence_timer = core.Clock()
-        away_time = []
+        # running total of the time spent looking away
+        away_time = 0.0
 
         looking = True
         trial_timer.reset()
@@ -1528,12 +1570,12 @@ class TobiiInfantController(TobiiController):
                 if not looking:
                     away_dur = absence_timer.getTime()
                     if away_dur >= min_away:
-                        away_time.append(away_dur)
-                        lt = trial_timer.getTime() - np.sum(away_time)
+                        away_time += away_dur
+                        lt = trial_timer.getTime() - away_time
                         # stop the trial
                         return round(lt, 3)
                     elif away_dur >= blink_dur:
-                        away_time.append(away_dur)
+                        away_time += away_dur
                     # if missing samples are tolerable
                     else:
                         pass
@@ -1542,8 +1584,8 @@ class TobiiInfantController(TobiiController):
             else:
                 if absence_timer.getTime() >= min_away:
                     away_dur = absence_timer.getTime()
-                    away_time.append(away_dur)
-                    lt = trial_timer.getTime() - np.sum(away_time)
+                    away_time += away_dur
+                    lt = trial_timer.getTime() - away_time
                     # terminate the trial
                     return round(lt, 3)
                 else:
@@ -1553,7 +1595,7 @@ class TobiiInfantController(TobiiController):
             self.win.flip()
         # if the loop is completed, return the looking time
         else:
-            lt = max_time - np.sum(away_time)
+            lt = max_time - away_time
             return round(lt, 3)
 
 
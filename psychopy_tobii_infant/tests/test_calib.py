@@ -199,6 +199,7 @@ class TestCalibInfant:
             self.validation.enter_validation_mode()
             self.update_validation(validation_points=validation_points,
                                    _focus_time=focus_time)
+            self.targets.restore()
             validation_result = self.validation.compute()
             self.validation.leave_validation_mode()
             self.win.flip()
@@ -223,3 +224,26 @@ class TestCalibInfant:
                                        infant_stims=val_stims,
                                        show_results=True,
                                        save_to_file=False)
+
+    def test_preloaded_stims(self):
+        stims = [
+            visual.ImageStim(self.win, image=x, autoLog=False)
+            for x in cal_stims
+        ]
+        sizes = [x.size.copy() for x in stims]
+        targets = InfantStimuli(self.win, stims, shuffle=False)
+        assert [targets.get_stim(i) for i in range(len(stims))] == stims
+        # resize, rotate and move the stimuli like the procedures do
+        for stim in stims:
+            stim.setSize(stim.size * 0.5)
+            stim.setOri(45)
+            stim.setPos((0.5, 0.5))
+        targets.restore()
+
+        # the restored stimuli can be used again
+        targets = InfantStimuli(self.win, stims, shuffle=False)
+        for i, stim in enumerate(stims):
+            assert (targets.get_stim_original_size(i) == sizes[i]).all()
+            assert (stim.size == sizes[i]).all()
+            assert stim.ori == 0
+            assert (stim.pos == (0, 0)).all()
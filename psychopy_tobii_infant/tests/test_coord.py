@@ -1,4 +1,5 @@
 from psychopy import monitors, visual
+from psychopy.tools.monitorunittools import pix2deg
 from psychopy_tobii_infant import TobiiController
 
 
@@ -51,6 +52,20 @@ class TestCoord:
             trans_point = tuple(round(pos, 4) for pos in trans_point)
             assert trans_point == psy_point
 
+    def test_get_psychopy_pos_deg(self):
+        self.mon.setSizePix([128, 128])
+        trans_points = [
+            self.controller._get_psychopy_pos(point, units="deg")
+            for point in self.tobii_points
+        ]
+        psy_points = [
+            tuple(round(pix2deg(pos, self.mon), 4) for pos in point)
+            for point in self.psy_points["pix"]
+        ]
+        for trans_point, psy_point in zip(trans_points, psy_points):
+            trans_point = tuple(round(pos, 4) for pos in trans_point)
+            assert trans_point == psy_point
+
     def test_get_tobii_pos_norm(self):
         psy_points = self.psy_points["norm"]
         trans_points = [